@@ -1,4 +1,4 @@
 from .db import init_db, get_db
+from .history_writer import HistoryWriter, history_writer
 
-__all__ = ["init_db", "get_db"]
-
+__all__ = ["init_db", "get_db", "HistoryWriter", "history_writer"]
@@ -0,0 +1,244 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from backend.database import db
+
+INSERT_REQUEST_SQL = (
+    "INSERT INTO requests (user_id, input_text, output_json, request_type, created_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+HistoryRow = Tuple[int, str, str, str, str]
+
+# Seconds SQLite waits on a locked database before raising, per attempt
+BUSY_TIMEOUT = 30.0
+
+# Backoff between retries of a batch while the database stays locked
+RETRY_INITIAL_DELAY = 0.1
+RETRY_MAX_DELAY = 5.0
+
+# While draining on stop(), a locked database is retried only a few times
+# with a short busy timeout, so shutdown finishes even if the lock is never
+# released. Rows that still cannot be written are dropped and logged.
+DRAIN_BUSY_TIMEOUT = 1.0
+DRAIN_MAX_ATTEMPTS = 3
+
+class _FlushRequest:
+    """Queue marker: commit everything queued before it, then signal"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        # False if the writer stopped before reaching the marker
+        self.ok = False
+
+_STOP = object()
+
+def _is_busy(error: sqlite3.Error) -> bool:
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+def _make_row(user_id: int, input_text: str, output_json: str, request_type: str) -> HistoryRow:
+    # Timestamp at submit time, in the same format as CURRENT_TIMESTAMP
+    created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return (user_id, input_text, output_json, request_type, created_at)
+
+class HistoryWriter:
+    """
+    Write-behind persistence for request history.
+
+    Rows are queued by the request handlers and inserted by a background
+    thread, many rows per transaction. A batch is committed once it reaches
+    batch_size rows or flush_interval seconds have passed since its first
+    row. The queue is bounded, so producers wait when the writer falls behind.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 0.5, max_queue_size: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._draining = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background writer thread"""
+        if self.running:
+            return
+        self._draining = False
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Write all queued rows, then stop the writer thread"""
+        if self.running:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                print(f"Warning: History writer queue still full after {timeout}s, not stopped")
+                return
+            self._thread.join(timeout)
+            # Still draining after the timeout: keep reporting it as running
+            if self._thread.is_alive():
+                print(f"Warning: History writer still draining after {timeout}s")
+                return
+            self._thread = None
+        # Rows left queued by a writer thread that exited on an error
+        self._write_leftovers()
+
+    def submit(self, user_id: int, input_text: str, output_json: str, request_type: str,
+               timeout: Optional[float] = None):
+        """Queue a history row, blocking while the queue is full"""
+        row = _make_row(user_id, input_text, output_json, request_type)
+        if not self.running:
+            # No writer thread (e.g. app not started through its lifespan)
+            with db.get_db() as conn:
+                conn.execute(INSERT_REQUEST_SQL, row)
+            return
+        self._queue.put(row, timeout=timeout)
+
+    async def submit_async(self, user_id: int, input_text: str, output_json: str, request_type: str):
+        """Queue a history row without blocking the event loop when the queue is full"""
+        if self.running:
+            try:
+                self._queue.put_nowait(_make_row(user_id, input_text, output_json, request_type))
+                return
+            except queue.Full:
+                pass
+        # Backpressure: wait for room in a worker thread
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.submit, user_id, input_text, output_json, request_type)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every row queued so far is committed"""
+        if not self.running:
+            return True
+        marker = _FlushRequest()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout) and marker.ok
+
+    def _run(self):
+        conn = None
+        batch: List[HistoryRow] = []
+        deadline = None
+        try:
+            conn = sqlite3.connect(db.DB_PATH, timeout=BUSY_TIMEOUT)
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    self._draining = True
+                    conn.execute(f"PRAGMA busy_timeout = {int(DRAIN_BUSY_TIMEOUT * 1000)}")
+
+                if item is None or item is _STOP or isinstance(item, _FlushRequest):
+                    self._write_batch(conn, batch)
+                    batch = []
+                    deadline = None
+                    if item is _STOP:
+                        return
+                    if isinstance(item, _FlushRequest):
+                        item.ok = True
+                        item.done.set()
+                    continue
+
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) >= self.batch_size:
+                    self._write_batch(conn, batch)
+                    batch = []
+                    deadline = None
+        except Exception as e:
+            print(f"Warning: History writer stopped: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+            self._release_pending(batch)
+
+    def _release_pending(self, batch: List[HistoryRow]):
+        """Wake any waiting flush() and keep unwritten rows queued for stop() or the next start()"""
+        rows = list(batch)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushRequest):
+                item.done.set()
+            elif item is not _STOP:
+                rows.append(item)
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                print(f"Warning: Could not keep unwritten history row for user {row[0]}")
+
+    def _write_leftovers(self):
+        """Write rows still queued while no writer thread is running"""
+        rows = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushRequest):
+                item.done.set()
+            elif item is not _STOP:
+                rows.append(item)
+        if not rows:
+            return
+        try:
+            with db.get_db() as conn:
+                conn.executemany(INSERT_REQUEST_SQL, rows)
+        except sqlite3.Error as e:
+            print(f"Warning: Dropped {len(rows)} unwritten history rows: {e}")
+
+    def _commit_rows(self, conn: sqlite3.Connection, rows: List[HistoryRow]) -> Optional[sqlite3.Error]:
+        """Insert rows in one transaction, retrying while locked. Returns the error if they can never be written"""
+        delay = RETRY_INITIAL_DELAY
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                conn.executemany(INSERT_REQUEST_SQL, rows)
+                conn.commit()
+                return None
+            except sqlite3.Error as e:
+                conn.rollback()
+                if not _is_busy(e) or (self._draining and attempts >= DRAIN_MAX_ATTEMPTS):
+                    return e
+                print(f"Warning: History database busy ({e}), retrying {len(rows)} rows in {delay:.1f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[HistoryRow]):
+        if not batch:
+            return
+        error = self._commit_rows(conn, batch)
+        if error is None:
+            return
+        if _is_busy(error):
+            # Only returned once retries ran out while draining on stop()
+            print(f"Warning: Dropped {len(batch)} history rows, database still locked at shutdown: {error}")
+            return
+        # Some row can never be written; save the others one at a time
+        for row in batch:
+            error = self._commit_rows(conn, [row])
+            if error is not None:
+                print(f"Warning: Dropping history row for user {row[0]}: {error}")
+
+history_writer = HistoryWriter()
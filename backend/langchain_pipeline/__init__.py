@@ -1,4 +1,4 @@
 from .pipeline import generate_specification, refine_specification
+from .router import ModelRouter
 
-__all__ = ["generate_specification", "refine_specification"]
-
+__all__ = ["generate_specification", "refine_specification", "ModelRouter"]
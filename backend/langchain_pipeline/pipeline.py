@@ -10,52 +10,173 @@ import json
 import os
 from typing import Dict, Any, Optional
 
-# Initialize LLM - using OpenAI by default, but can be configured
+from backend.models.spec import SpecResponse
+from .router import ModelRouter, load_stage_config
+
+# Initialize LLM router - using OpenAI by default, but can be configured
 # For HuggingFace Spaces, you might want to use HuggingFace models
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 
-# Use ChatOpenAI for better results
+def create_chat_model(model: str, temperature: float, base_url: Optional[str] = None):
+    """Create a chat client for one model tier"""
+    return ChatOpenAI(temperature=temperature, model=model, api_key=OPENAI_API_KEY, base_url=base_url)
+
+# Each stage gets its own model and temperature, see router.py
 if LANGCHAIN_AVAILABLE and OPENAI_API_KEY:
+    # Config errors (e.g. an unknown <STAGE>_MODEL_TIER) fail startup
+    stage_config = load_stage_config()
     try:
-        llm = ChatOpenAI(temperature=0.7, model="gpt-3.5-turbo", api_key=OPENAI_API_KEY)
+        router = ModelRouter(create_chat_model, stage_config=stage_config)
+        router.preload()
     except Exception as e:
         print(f"Warning: Could not initialize OpenAI LLM: {e}. Using mock responses.")
-        llm = None
+        router = None
 else:
     # Fallback to a mock or HuggingFace model
     # For production, configure with HuggingFace or other providers
     if not OPENAI_API_KEY:
         print("Warning: OPENAI_API_KEY not set. Using mock responses.")
-    llm = None
+    router = None
+
+def clean_json_content(content: str) -> str:
+    """Strip markdown code blocks around a JSON response"""
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.startswith("```"):
+        content = content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    return content.strip()
+
+# Pipeline mode: "multi_stage" (3 calls), "one_shot" (1 call) or "auto"
+PIPELINE_MODES = ("auto", "one_shot", "multi_stage")
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "auto")
+if PIPELINE_MODE not in PIPELINE_MODES:
+    raise ValueError(f"Invalid PIPELINE_MODE {PIPELINE_MODE!r}: expected one of {', '.join(PIPELINE_MODES)}")
+
+# In auto mode, requirements up to this length use the one-shot call
+ONE_SHOT_MAX_CHARS = int(os.getenv("ONE_SHOT_MAX_CHARS", "2000"))
+
+# Share of modules that need at least one user story in a one-shot result
+ONE_SHOT_MIN_MODULE_COVERAGE = float(os.getenv("ONE_SHOT_MIN_MODULE_COVERAGE", "0.8"))
+
+# Item fields for each SpecResponse section, matching the multi-stage prompts.
+# Strict schemas cannot contain free-form objects, so request/response
+# schemas are returned as JSON-encoded strings and decoded afterwards.
+SPEC_ITEM_FIELDS = {
+    "modules": {
+        "name": {"type": "string"},
+        "description": {"type": "string"}
+    },
+    "user_stories": {
+        "module": {"type": "string"},
+        "story": {"type": "string"},
+        "acceptance_criteria": {"type": "array", "items": {"type": "string"}}
+    },
+    "api_endpoints": {
+        "endpoint": {"type": "string"},
+        "method": {"type": "string"},
+        "description": {"type": "string"},
+        "request_schema": {"type": "string", "description": "JSON-encoded schema of the request body"},
+        "response_schema": {"type": "string", "description": "JSON-encoded schema of the response body"},
+        "module": {"type": "string"}
+    },
+    "db_schema": {
+        "table_name": {"type": "string"},
+        "columns": {"type": "array", "items": {
+            "column_name": {"type": "string"},
+            "data_type": {"type": "string"},
+            "constraints": {"type": "string"},
+            "description": {"type": "string"}
+        }},
+        "module": {"type": "string"}
+    },
+    "edge_cases": {
+        "module": {"type": "string"},
+        "scenario": {"type": "string"},
+        "handling": {"type": "string"}
+    }
+}
+
+def _strict_object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    for name, field in properties.items():
+        # Arrays of objects are written as {"type": "array", "items": {fields}}
+        if field.get("type") == "array" and "type" not in field["items"]:
+            properties[name] = {"type": "array", "items": _strict_object(field["items"])}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+def build_spec_json_schema() -> Dict[str, Any]:
+    """Strict JSON schema for the one-shot call, derived from SpecResponse"""
+    response_schema = SpecResponse.model_json_schema()
+    sections = {}
+    for name in response_schema["required"]:
+        sections[name] = {
+            "type": response_schema["properties"][name]["type"],
+            "items": _strict_object(dict(SPEC_ITEM_FIELDS[name]))
+        }
+    return _strict_object(sections)
+
+SPEC_JSON_SCHEMA = build_spec_json_schema()
+SPEC_SECTIONS = list(SPEC_JSON_SCHEMA["properties"])
 
-async def generate_specification(requirement_text: str) -> Dict[str, Any]:
+def select_pipeline_mode(requirement_text: str, mode: Optional[str] = None) -> str:
+    """Resolve "auto" to "one_shot" or "multi_stage" based on input length"""
+    mode = mode or PIPELINE_MODE
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unknown pipeline mode: {mode}")
+    if mode == "auto":
+        return "one_shot" if len(requirement_text) <= ONE_SHOT_MAX_CHARS else "multi_stage"
+    return mode
+
+async def generate_specification(requirement_text: str, mode: Optional[str] = None) -> Dict[str, Any]:
     """
-    Generate specification using 3-step LangChain pipeline
+    Generate specification using 3-step LangChain pipeline, or a single
+    schema-constrained call in one-shot mode
     """
-    if not llm:
+    if not router:
         # Return mock data for testing without API key
         return get_mock_specification()
     
+    # Model used by each stage, returned alongside the spec
+    stage_models = {}
+    
+    if select_pipeline_mode(requirement_text, mode) == "one_shot":
+        try:
+            result = await generate_one_shot(requirement_text, stage_models)
+        except Exception as e:
+            print(f"Warning: One-shot generation failed: {e}. Falling back to multi-stage.")
+            result = None
+        if result is not None:
+            result["stage_models"] = stage_models
+            return result
+        stage_models = {}
+    
     # STEP 1: Extract Modules/Features
-    modules = await extract_modules(requirement_text)
+    modules = await extract_modules(requirement_text, stage_models)
     
     # STEP 2: Generate User Stories
-    user_stories = await generate_user_stories(requirement_text, modules)
+    user_stories = await generate_user_stories(requirement_text, modules, stage_models)
     
     # STEP 3: Generate API + DB + Edge Cases
-    api_db_edge = await generate_api_db_edge_cases(requirement_text, modules)
+    api_db_edge = await generate_api_db_edge_cases(requirement_text, modules, stage_models)
     
     return {
         "modules": modules,
         "user_stories": user_stories,
         "api_endpoints": api_db_edge.get("api_endpoints", []),
         "db_schema": api_db_edge.get("db_schema", []),
-        "edge_cases": api_db_edge.get("edge_cases", [])
+        "edge_cases": api_db_edge.get("edge_cases", []),
+        "stage_models": stage_models
     }
 
-async def extract_modules(requirement_text: str) -> list:
+async def extract_modules(requirement_text: str, stage_models: Optional[Dict[str, str]] = None) -> list:
     """Step 1: Extract high-level modules/features"""
-    if not llm:
+    if not router:
         return get_mock_specification()["modules"]
     
     prompt = f"""Extract the high-level modules/features from the following requirement text.
@@ -73,17 +194,10 @@ Return only valid JSON array, no markdown formatting."""
         HumanMessage(content=prompt)
     ]
     
-    response = llm(messages)
-    content = response.content.strip()
-    
-    # Clean up markdown code blocks if present
-    if content.startswith("```json"):
-        content = content[7:]
-    if content.startswith("```"):
-        content = content[3:]
-    if content.endswith("```"):
-        content = content[:-3]
-    content = content.strip()
+    content, model = await router.invoke("modules", requirement_text, messages)
+    content = clean_json_content(content)
+    if stage_models is not None:
+        stage_models["modules"] = model
     
     try:
         modules = json.loads(content)
@@ -94,9 +208,13 @@ Return only valid JSON array, no markdown formatting."""
         # Fallback parsing
         return [{"name": "Module 1", "description": "Extracted from requirements"}]
 
-async def generate_user_stories(requirement_text: str, modules: list) -> list:
+async def generate_user_stories(
+    requirement_text: str,
+    modules: list,
+    stage_models: Optional[Dict[str, str]] = None
+) -> list:
     """Step 2: Generate detailed user stories"""
-    if not llm:
+    if not router:
         return get_mock_specification()["user_stories"]
     
     modules_text = json.dumps(modules, indent=2)
@@ -120,17 +238,10 @@ Return only valid JSON array of user stories, no markdown formatting."""
         HumanMessage(content=prompt)
     ]
     
-    response = llm(messages)
-    content = response.content.strip()
-    
-    # Clean up markdown code blocks
-    if content.startswith("```json"):
-        content = content[7:]
-    if content.startswith("```"):
-        content = content[3:]
-    if content.endswith("```"):
-        content = content[:-3]
-    content = content.strip()
+    content, model = await router.invoke("user_stories", requirement_text, messages)
+    content = clean_json_content(content)
+    if stage_models is not None:
+        stage_models["user_stories"] = model
     
     try:
         stories = json.loads(content)
@@ -138,9 +249,13 @@ Return only valid JSON array of user stories, no markdown formatting."""
     except json.JSONDecodeError:
         return []
 
-async def generate_api_db_edge_cases(requirement_text: str, modules: list) -> Dict[str, Any]:
+async def generate_api_db_edge_cases(
+    requirement_text: str,
+    modules: list,
+    stage_models: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
     """Step 3: Generate API endpoints, DB schema, and edge cases"""
-    if not llm:
+    if not router:
         mock = get_mock_specification()
         return {
             "api_endpoints": mock["api_endpoints"],
@@ -162,7 +277,7 @@ For API endpoints, include:
 
 For DB schema, include:
 - "table_name": name of table
-- "columns": array of {column_name, data_type, constraints, description}
+- "columns": array of {{column_name, data_type, constraints, description}}
 - "module": module name
 
 For edge cases, include:
@@ -183,17 +298,10 @@ Return only valid JSON object with keys: "api_endpoints", "db_schema", "edge_cas
         HumanMessage(content=prompt)
     ]
     
-    response = llm(messages)
-    content = response.content.strip()
-    
-    # Clean up markdown code blocks
-    if content.startswith("```json"):
-        content = content[7:]
-    if content.startswith("```"):
-        content = content[3:]
-    if content.endswith("```"):
-        content = content[:-3]
-    content = content.strip()
+    content, model = await router.invoke("api_db_edge", requirement_text, messages)
+    content = clean_json_content(content)
+    if stage_models is not None:
+        stage_models["api_db_edge"] = model
     
     try:
         result = json.loads(content)
@@ -209,13 +317,92 @@ Return only valid JSON object with keys: "api_endpoints", "db_schema", "edge_cas
             "edge_cases": []
         }
 
+def _normalize_name(name: Any) -> str:
+    return " ".join(str(name or "").lower().split())
+
+def incomplete_spec_reason(result: Any) -> Optional[str]:
+    """Return why a one-shot result is incomplete, or None if it can be used"""
+    if not isinstance(result, dict) or not all(isinstance(result.get(s), list) for s in SPEC_SECTIONS):
+        return "missing sections"
+    # A strict schema always returns every key, so require actual content
+    for section in ("modules", "user_stories", "api_endpoints"):
+        if not result[section]:
+            return f"no {section}"
+    if not all(isinstance(item, dict) for item in result["modules"] + result["user_stories"]):
+        return "malformed modules or user_stories"
+    
+    # Names may differ slightly ("Authentication" vs "User Authentication")
+    story_modules = {_normalize_name(story.get("module")) for story in result["user_stories"]}
+    uncovered = []
+    for module in result["modules"]:
+        name = _normalize_name(module.get("name"))
+        if not any(name == m or (name and m and (name in m or m in name)) for m in story_modules):
+            uncovered.append(module.get("name"))
+    coverage = 1 - len(uncovered) / len(result["modules"])
+    if coverage < ONE_SHOT_MIN_MODULE_COVERAGE:
+        return f"no user stories for modules {uncovered}"
+    return None
+
+async def generate_one_shot(
+    requirement_text: str,
+    stage_models: Optional[Dict[str, str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Generate every section in one call. Returns None if the output is incomplete"""
+    prompt = f"""Generate a complete software specification for the following requirement text.
+
+Include:
+- "modules": high-level modules/features, each with "name" and "description"
+- "user_stories": for each module, "module", "story" in format "As a [role], I want [feature] so that [benefit]" and "acceptance_criteria"
+- "api_endpoints": production-level endpoints with "endpoint", "method", "description", "request_schema" and "response_schema" (each a JSON-encoded schema string) and "module"
+- "db_schema": tables with "table_name", "columns" (each with column_name, data_type, constraints, description) and "module"
+- "edge_cases": for each module, "module", "scenario" and "handling"
+
+Requirement text:
+{requirement_text}
+
+Return only valid JSON matching the schema, no markdown formatting."""
+    
+    messages = [
+        SystemMessage(content="You are a software architect producing complete specifications: modules, user stories, API specs, database schemas and edge cases. Always return valid JSON."),
+        HumanMessage(content=prompt)
+    ]
+    
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {"name": "specification", "strict": True, "schema": SPEC_JSON_SCHEMA}
+    }
+    content, model = await router.invoke("one_shot", requirement_text, messages, response_format=response_format)
+    content = clean_json_content(content)
+    
+    try:
+        result = json.loads(content)
+    except json.JSONDecodeError:
+        print("Warning: One-shot output is not valid JSON. Falling back to multi-stage.")
+        return None
+    reason = incomplete_spec_reason(result)
+    if reason:
+        print(f"Warning: One-shot output incomplete ({reason}). Falling back to multi-stage.")
+        return None
+    
+    for endpoint in result["api_endpoints"]:
+        for key in ("request_schema", "response_schema"):
+            if isinstance(endpoint.get(key), str):
+                try:
+                    endpoint[key] = json.loads(endpoint[key])
+                except json.JSONDecodeError:
+                    pass
+    
+    if stage_models is not None:
+        stage_models["one_shot"] = model
+    return {s: result[s] for s in SPEC_SECTIONS}
+
 async def refine_specification(
     requirement_text: str,
     refinement_instructions: str,
     previous_spec: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """Refine an existing specification with additional instructions"""
-    if not llm or not LANGCHAIN_AVAILABLE:
+    if not router or not LANGCHAIN_AVAILABLE:
         return get_mock_specification()
     
     previous_spec_text = json.dumps(previous_spec, indent=2) if previous_spec else "None"
@@ -239,20 +426,14 @@ Return only valid JSON object with keys: "modules", "user_stories", "api_endpoin
         HumanMessage(content=prompt)
     ]
     
-    response = llm(messages)
-    content = response.content.strip()
-    
-    # Clean up markdown code blocks
-    if content.startswith("```json"):
-        content = content[7:]
-    if content.startswith("```"):
-        content = content[3:]
-    if content.endswith("```"):
-        content = content[:-3]
-    content = content.strip()
+    content, model = await router.invoke("refine", requirement_text, messages)
+    content = clean_json_content(content)
     
     try:
-        return json.loads(content)
+        result = json.loads(content)
+        if isinstance(result, dict):
+            result["stage_models"] = {"refine": model}
+        return result
     except json.JSONDecodeError:
         return get_mock_specification()
 
@@ -0,0 +1,149 @@
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Model tiers. "fast" is used for small, classification-like stages,
+# "strong" for stages that need more reasoning (API/DB design, refinement).
+MODEL_TIERS: Dict[str, Dict[str, Any]] = {
+    "fast": {
+        "model": os.getenv("FAST_MODEL", "gpt-3.5-turbo"),
+        "base_url": os.getenv("FAST_MODEL_BASE_URL") or None,
+    },
+    "strong": {
+        "model": os.getenv("STRONG_MODEL", "gpt-4o-mini"),
+        "base_url": os.getenv("STRONG_MODEL_BASE_URL") or None,
+    },
+}
+
+# Per-stage defaults. Each can be overridden with <STAGE>_MODEL_TIER and
+# <STAGE>_TEMPERATURE, e.g. MODULES_MODEL_TIER=strong.
+# "latency_budget" (seconds) lets a strong-tier stage fall back to the fast
+# tier while that stage's calls on the strong tier are observed to be slower
+# than the budget. While degraded, one call per PROBE_INTERVAL goes to the
+# strong tier so the fallback ends once it is fast again.
+DEFAULT_STAGE_CONFIG: Dict[str, Dict[str, Any]] = {
+    "modules": {"tier": "fast", "temperature": 0.2, "latency_budget": None},
+    "user_stories": {"tier": "strong", "temperature": 0.7, "latency_budget": None},
+    "api_db_edge": {"tier": "strong", "temperature": 0.3, "latency_budget": None},
+    "refine": {"tier": "strong", "temperature": 0.5, "latency_budget": None},
+    "one_shot": {"tier": "strong", "temperature": 0.3, "latency_budget": None},
+}
+
+# Inputs longer than this are escalated from the fast tier to the strong tier
+LARGE_INPUT_CHARS = int(os.getenv("ROUTER_LARGE_INPUT_CHARS", "4000"))
+
+# Seconds after which a tier's latency sample is stale and worth re-probing
+PROBE_INTERVAL = float(os.getenv("ROUTER_PROBE_INTERVAL", "30"))
+
+def load_stage_config() -> Dict[str, Dict[str, Any]]:
+    """Build the stage configuration, applying environment overrides"""
+    config = {}
+    for stage, defaults in DEFAULT_STAGE_CONFIG.items():
+        prefix = stage.upper()
+        budget = os.getenv(f"{prefix}_LATENCY_BUDGET")
+        tier = os.getenv(f"{prefix}_MODEL_TIER", defaults["tier"])
+        if tier not in MODEL_TIERS:
+            raise ValueError(
+                f"Invalid {prefix}_MODEL_TIER {tier!r}: expected one of {', '.join(MODEL_TIERS)}"
+            )
+        config[stage] = {
+            "tier": tier,
+            "temperature": float(os.getenv(f"{prefix}_TEMPERATURE", defaults["temperature"])),
+            "latency_budget": float(budget) if budget else defaults["latency_budget"],
+        }
+    return config
+
+class ModelRouter:
+    """Pick a model tier per stage based on input size and observed latency"""
+
+    def __init__(
+        self,
+        client_factory: Callable[..., Any],
+        tiers: Optional[Dict[str, Dict[str, Any]]] = None,
+        stage_config: Optional[Dict[str, Dict[str, Any]]] = None,
+        large_input_chars: int = LARGE_INPUT_CHARS,
+        smoothing: float = 0.3,
+        probe_interval: float = PROBE_INTERVAL,
+    ):
+        self.client_factory = client_factory
+        self.tiers = tiers or MODEL_TIERS
+        self.stage_config = stage_config or load_stage_config()
+        self.large_input_chars = large_input_chars
+        self.smoothing = smoothing
+        self.probe_interval = probe_interval
+        # Exponential moving average of call latency per (tier, stage), in
+        # seconds. Keyed by stage so a slow one-shot call does not push a
+        # single-stage call over its budget.
+        self.latency: Dict[Tuple[str, str], float] = {}
+        # When each (tier, stage) last produced a latency sample / was last probed
+        self._sampled_at: Dict[Tuple[str, str], float] = {}
+        self._probed_at: Dict[Tuple[str, str], float] = {}
+        self._clients: Dict[Tuple[str, float], Any] = {}
+
+    def select_tier(self, stage: str, requirement_text: str) -> str:
+        """Choose the tier for a stage"""
+        config = self.stage_config.get(stage, {"tier": "strong", "latency_budget": None})
+        tier = config["tier"]
+
+        # Large inputs need the stronger model regardless of stage
+        if tier == "fast" and len(requirement_text) > self.large_input_chars:
+            return "strong"
+
+        # Degrade to the fast tier while this stage is over budget on strong
+        budget = config.get("latency_budget")
+        if tier == "strong" and budget is not None:
+            strong_key = ("strong", stage)
+            strong_latency = self.latency.get(strong_key)
+            fast_latency = self.latency.get(("fast", stage))
+            if strong_latency is not None and strong_latency > budget:
+                if fast_latency is None or fast_latency < strong_latency:
+                    # Send a probe to the strong tier once its sample is stale
+                    now = time.monotonic()
+                    last = max(self._sampled_at.get(strong_key, 0.0), self._probed_at.get(strong_key, 0.0))
+                    if now - last >= self.probe_interval:
+                        self._probed_at[strong_key] = now
+                        return "strong"
+                    return "fast"
+
+        return tier
+
+    def get_client(self, stage: str, tier: str) -> Any:
+        """Return a cached chat client for the tier and stage temperature"""
+        temperature = self.stage_config.get(stage, {}).get("temperature", 0.7)
+        key = (tier, temperature)
+        if key not in self._clients:
+            tier_config = self.tiers[tier]
+            self._clients[key] = self.client_factory(
+                model=tier_config["model"],
+                temperature=temperature,
+                base_url=tier_config.get("base_url"),
+            )
+        return self._clients[key]
+
+    def preload(self) -> None:
+        """Create the clients for each stage's configured tier up front"""
+        for stage, config in self.stage_config.items():
+            self.get_client(stage, config["tier"])
+
+    def record_latency(self, tier: str, stage: str, seconds: float) -> None:
+        key = (tier, stage)
+        now = time.monotonic()
+        previous = self.latency.get(key)
+        # A stale average (e.g. before a probe) is replaced, not smoothed
+        if previous is None or now - self._sampled_at[key] >= self.probe_interval:
+            self.latency[key] = seconds
+        else:
+            self.latency[key] = self.smoothing * seconds + (1 - self.smoothing) * previous
+        self._sampled_at[key] = now
+
+    async def invoke(self, stage: str, requirement_text: str, messages: List[Any], **kwargs) -> Tuple[str, str]:
+        """Run a stage on the routed model. Returns (content, model name)"""
+        tier = self.select_tier(stage, requirement_text)
+        client = self.get_client(stage, tier)
+
+        started = time.perf_counter()
+        # kwargs such as response_format go straight to the model call
+        response = await client.ainvoke(messages, **kwargs)
+        self.record_latency(tier, stage, time.perf_counter() - started)
+
+        return response.content.strip(), self.tiers[tier]["model"]
@@ -1,10 +1,23 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.routes.auth import router as auth_router
 from backend.routes.generate import router as generate_router
-from backend.database import init_db
+from backend.database import init_db, history_writer
 
-app = FastAPI(title="Requirements Spec Copilot API", version="1.0.0")
+# Seconds shutdown waits for the history writer to drain
+HISTORY_STOP_TIMEOUT = 10.0
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background writer for request history, drained on shutdown
+    history_writer.start()
+    yield
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, history_writer.stop, HISTORY_STOP_TIMEOUT)
+
+app = FastAPI(title="Requirements Spec Copilot API", version="1.0.0", lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -1,8 +1,10 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 
 class SpecRequest(BaseModel):
     requirement_text: str
+    # Pipeline mode; defaults to the PIPELINE_MODE setting ("auto")
+    mode: Optional[Literal["auto", "one_shot", "multi_stage"]] = None
 
 class SpecRefineRequest(BaseModel):
     requirement_text: str
@@ -15,4 +17,6 @@ class SpecResponse(BaseModel):
     api_endpoints: List[Dict[str, Any]]
     db_schema: List[Dict[str, Any]]
     edge_cases: List[Dict[str, Any]]
+    # Model used by each pipeline stage, e.g. {"modules": "gpt-3.5-turbo"}
+    stage_models: Optional[Dict[str, str]] = None
 
@@ -2,12 +2,17 @@ from fastapi import APIRouter, HTTPException, Depends, Header
 from typing import Optional
 from backend.models.spec import SpecRequest, SpecRefineRequest, SpecResponse
 from backend.database.db import get_db
+from backend.database.history_writer import history_writer
 from backend.core.auth import verify_token
 from backend.langchain_pipeline.pipeline import generate_specification, refine_specification
+import asyncio
 import json
 
 router = APIRouter()
 
+# Seconds GET /history waits for queued history rows to be written
+HISTORY_FLUSH_TIMEOUT = 5.0
+
 def get_current_user(authorization: Optional[str] = Header(None)):
     """Dependency to get current authenticated user"""
     if not authorization:
@@ -31,17 +36,13 @@ async def generate_spec(
 ):
     """Generate specification from requirement text"""
     try:
-        result = await generate_specification(request.requirement_text)
+        result = await generate_specification(request.requirement_text, request.mode)
         
-        # Save to history
+        # Save to history (written in batches by the background writer)
         user_id = current_user["user_id"]
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO requests (user_id, input_text, output_json, request_type) VALUES (?, ?, ?, ?)",
-                (user_id, request.requirement_text, json.dumps(result), "generate")
-            )
-            conn.commit()
+        await history_writer.submit_async(
+            user_id, request.requirement_text, json.dumps(result), "generate"
+        )
         
         return SpecResponse(**result)
     except Exception as e:
@@ -60,16 +61,12 @@ async def refine_spec(
             request.previous_spec
         )
         
-        # Save to history
+        # Save to history (written in batches by the background writer)
         user_id = current_user["user_id"]
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO requests (user_id, input_text, output_json, request_type) VALUES (?, ?, ?, ?)",
-                (user_id, f"{request.requirement_text}\n\nRefinement: {request.refinement_instructions}", 
-                 json.dumps(result), "refine")
-            )
-            conn.commit()
+        await history_writer.submit_async(
+            user_id, f"{request.requirement_text}\n\nRefinement: {request.refinement_instructions}",
+            json.dumps(result), "refine"
+        )
         
         return SpecResponse(**result)
     except Exception as e:
@@ -82,6 +79,11 @@ async def get_history(
 ):
     """Get user's request history"""
     user_id = current_user["user_id"]
+    
+    # Make sure rows still queued in the history writer are visible
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, history_writer.flush, HISTORY_FLUSH_TIMEOUT)
+    
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
@@ -0,0 +1,119 @@
+"""
+Local fake OpenAI-compatible chat endpoints for benchmarks.
+
+Each endpoint sleeps according to its latency profile and answers with the
+mock specification section matching the pipeline stage that called it.
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+# The pipeline only builds its model router when a key is set
+os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+
+from backend.langchain_pipeline.pipeline import get_mock_specification
+
+def stage_response(messages: List[Dict[str, Any]]) -> str:
+    """Pick the canned answer for the stage identified by its system prompt"""
+    mock = get_mock_specification()
+    system = messages[0]["content"] if messages else ""
+    if "complete specifications" in system:
+        return json.dumps(mock)
+    if "Extract modules" in system:
+        return json.dumps(mock["modules"])
+    if "user stories" in system:
+        return json.dumps(mock["user_stories"])
+    if "senior backend engineer" in system:
+        return json.dumps({
+            "api_endpoints": mock["api_endpoints"],
+            "db_schema": mock["db_schema"],
+            "edge_cases": mock["edge_cases"]
+        })
+    return json.dumps(mock)
+
+class FakeModelEndpoint:
+    """Fake chat completions server with a fixed + per-character latency"""
+
+    def __init__(self, name: str, base_latency: float, per_char_latency: float = 0.0,
+                 per_completion_char_latency: float = 0.0):
+        self.name = name
+        self.base_latency = base_latency
+        self.per_char_latency = per_char_latency
+        self.per_completion_char_latency = per_completion_char_latency
+        self.calls = 0
+        # Approximate token usage served so far (4 characters per token)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeModelEndpoint":
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                messages = body.get("messages", [])
+                prompt_chars = sum(len(m.get("content") or "") for m in messages)
+                content = endpoint.respond(body, messages)
+                time.sleep(
+                    endpoint.base_latency
+                    + endpoint.per_char_latency * prompt_chars
+                    + endpoint.per_completion_char_latency * len(content)
+                )
+                with endpoint._lock:
+                    endpoint.calls += 1
+                    endpoint.prompt_tokens += prompt_chars // 4
+                    endpoint.completion_tokens += len(content) // 4
+
+                payload = json.dumps({
+                    "id": f"fake-{time.monotonic_ns()}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", endpoint.name),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_chars // 4,
+                        "completion_tokens": len(content) // 4,
+                        "total_tokens": (prompt_chars + len(content)) // 4
+                    }
+                }).encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def reset_usage(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+
+    def respond(self, body: Dict[str, Any], messages: List[Dict[str, Any]]) -> str:
+        return stage_response(messages)
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,88 @@
+"""
+Benchmark history persistence: per-request commits vs the write-behind writer.
+
+Simulates concurrent request handlers that each save one history row, using
+a temporary SQLite database:
+  - direct:       INSERT + commit inside the handler (the old route code)
+  - write-behind: HistoryWriter.submit_async, batched by a background thread
+
+Reports insert throughput (rows committed per second, including the final
+drain) and the latency the save step adds to each request.
+
+Run from the project root:
+    python -m benchmarks.history_writes
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from backend.database import db
+from backend.database.history_writer import HistoryWriter
+
+OUTPUT_JSON = json.dumps({"modules": [{"name": "Module", "description": "x" * 2000}]})
+
+async def direct_save(user_id: int):
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO requests (user_id, input_text, output_json, request_type) VALUES (?, ?, ?, ?)",
+            (user_id, "requirement text", OUTPUT_JSON, "generate")
+        )
+        conn.commit()
+
+async def run_mode(mode: str, requests: int, concurrency: int, writer: HistoryWriter):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handle(i: int):
+        async with semaphore:
+            # Yield like a real handler finishing its LLM work
+            await asyncio.sleep(0)
+            started = time.perf_counter()
+            if mode == "direct":
+                await direct_save(i)
+            else:
+                await writer.submit_async(i, "requirement text", OUTPUT_JSON, "generate")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handle(i) for i in range(requests)))
+    if mode == "write-behind":
+        writer.stop()
+    return time.perf_counter() - started, latencies
+
+def count_rows() -> int:
+    with db.get_db() as conn:
+        return conn.execute("SELECT COUNT(*) FROM requests").fetchone()[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<13} {'rows/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'rows':>6}")
+    for mode in ("direct", "write-behind"):
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_PATH = os.path.join(tmp, "bench.db")
+            db.init_db()
+            writer = HistoryWriter(batch_size=args.batch_size, max_queue_size=args.queue_size)
+            if mode == "write-behind":
+                writer.start()
+
+            elapsed, latencies = asyncio.run(run_mode(mode, args.requests, args.concurrency, writer))
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(
+                f"{mode:<13} {args.requests / elapsed:>9.0f} "
+                f"{statistics.median(latencies) * 1000:>9.3f} {p99 * 1000:>9.3f} {count_rows():>6}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark per-stage model routing against a single-model pipeline.
+
+Starts two local fake model endpoints, a fast one and a slow "strong" one,
+and runs generate_specification end to end with:
+  - single: every stage on the strong model (the old hard-coded setup)
+  - routed: module extraction on the fast tier, other stages on strong
+  - budget: routed, plus a latency budget that lets strong stages degrade
+            to the fast tier while the strong tier is too slow
+
+Run from the project root:
+    python -m benchmarks.model_routing
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.fake_llm import FakeModelEndpoint
+from backend.langchain_pipeline import pipeline
+from backend.langchain_pipeline.router import ModelRouter
+
+SAMPLE_REQUIREMENT = (
+    "Build an e-commerce platform with user authentication, product catalog, "
+    "shopping cart, and checkout functionality. Users should be able to search "
+    "products, add items to cart, and complete purchases with payment integration."
+)
+
+def build_router(fast: FakeModelEndpoint, strong: FakeModelEndpoint, mode: str) -> ModelRouter:
+    tiers = {
+        "fast": {"model": "fake-fast", "base_url": fast.base_url},
+        "strong": {"model": "fake-strong", "base_url": strong.base_url},
+    }
+    stage_config = {
+        "modules": {"tier": "fast", "temperature": 0.2, "latency_budget": None},
+        "user_stories": {"tier": "strong", "temperature": 0.7, "latency_budget": None},
+        "api_db_edge": {"tier": "strong", "temperature": 0.3, "latency_budget": None},
+        "refine": {"tier": "strong", "temperature": 0.5, "latency_budget": None},
+    }
+    if mode == "single":
+        for config in stage_config.values():
+            config["tier"] = "strong"
+    elif mode == "budget":
+        stage_config["user_stories"]["latency_budget"] = strong.base_latency / 2
+    return ModelRouter(pipeline.create_chat_model, tiers=tiers, stage_config=stage_config)
+
+async def run_mode(fast, strong, mode: str, iterations: int):
+    pipeline.router = build_router(fast, strong, mode)
+    timings = []
+    stage_models = {}
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = await pipeline.generate_specification(SAMPLE_REQUIREMENT, "multi_stage")
+        timings.append(time.perf_counter() - started)
+        stage_models = result["stage_models"]
+    return timings, stage_models
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--fast-latency", type=float, default=0.05)
+    parser.add_argument("--strong-latency", type=float, default=0.4)
+    args = parser.parse_args()
+
+    fast = FakeModelEndpoint("fake-fast", args.fast_latency, per_char_latency=0.00001).start()
+    strong = FakeModelEndpoint("fake-strong", args.strong_latency, per_char_latency=0.00005).start()
+    try:
+        print(f"{'mode':<8} {'mean (s)':>9} {'p50 (s)':>9} {'max (s)':>9}  stage models")
+        baseline = None
+        for mode in ("single", "routed", "budget"):
+            timings, stage_models = asyncio.run(run_mode(fast, strong, mode, args.iterations))
+            mean = statistics.mean(timings)
+            baseline = baseline or mean
+            print(
+                f"{mode:<8} {mean:>9.3f} {statistics.median(timings):>9.3f} {max(timings):>9.3f}  "
+                f"{stage_models}  ({baseline / mean:.2f}x vs single)"
+            )
+    finally:
+        fast.stop()
+        strong.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark one-shot vs multi-stage specification generation.
+
+Replays model responses from a fixture file through a local fake endpoint
+and runs generate_specification in each mode:
+  - multi_stage: modules, user stories, then API/DB/edge cases (3 calls)
+  - one_shot:    one schema-constrained call for every section
+  - auto:        one_shot up to ONE_SHOT_MAX_CHARS, multi_stage above
+
+Reports latency, approximate tokens (4 characters per token) and output
+completeness: items per section and the share of expected item fields
+that are filled in.
+
+The bundled fixtures (benchmarks/fixtures/pipeline_modes.json) are
+synthetic, not recorded model output. Their one-shot responses are
+written thinner than the multi-stage ones: one user story and one edge
+case per module, and for the long input fewer endpoints and columns. The
+completeness numbers therefore only reflect that assumption. Pass real
+recordings with --fixtures to measure actual model behaviour.
+
+Run from the project root:
+    python -m benchmarks.pipeline_modes
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from benchmarks.fake_llm import FakeModelEndpoint
+from backend.langchain_pipeline import pipeline
+from backend.langchain_pipeline.router import ModelRouter
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "pipeline_modes.json")
+
+class FixtureEndpoint(FakeModelEndpoint):
+    """Answers each stage with the fixture response for the current case"""
+
+    fixture = None
+
+    def respond(self, body, messages):
+        responses = self.fixture["responses"]
+        system = messages[0]["content"]
+        if "complete specifications" in system:
+            return json.dumps(responses["one_shot"])
+        if "Extract modules" in system:
+            return json.dumps(responses["modules"])
+        if "user stories" in system:
+            return json.dumps(responses["user_stories"])
+        return json.dumps(responses["api_db_edge"])
+
+def completeness(result):
+    """Items per section and fraction of expected item fields that are non-empty"""
+    items = 0
+    filled = 0
+    expected = 0
+    for section, fields in pipeline.SPEC_ITEM_FIELDS.items():
+        for item in result.get(section, []):
+            items += 1
+            for field in fields:
+                expected += 1
+                if item.get(field) not in (None, "", [], {}):
+                    filled += 1
+    sections = sum(1 for section in pipeline.SPEC_SECTIONS if result.get(section))
+    return sections, items, filled / expected if expected else 0.0
+
+async def run_case(endpoint, fixture, mode, iterations):
+    endpoint.fixture = fixture
+    endpoint.reset_usage()
+    timings = []
+    result = {}
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = await pipeline.generate_specification(fixture["requirement_text"], mode)
+        timings.append(time.perf_counter() - started)
+    tokens = (endpoint.prompt_tokens + endpoint.completion_tokens) // iterations
+    return statistics.mean(timings), tokens, endpoint.calls // iterations, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--base-latency", type=float, default=0.3, help="fixed seconds per call")
+    parser.add_argument("--completion-latency", type=float, default=0.00005, help="seconds per output character")
+    args = parser.parse_args()
+
+    with open(args.fixtures) as f:
+        fixtures = json.load(f)
+
+    endpoint = FixtureEndpoint(
+        "fake-model", args.base_latency,
+        per_char_latency=0.000005, per_completion_char_latency=args.completion_latency
+    ).start()
+    tiers = {
+        "fast": {"model": "fake-model", "base_url": endpoint.base_url},
+        "strong": {"model": "fake-model", "base_url": endpoint.base_url},
+    }
+    pipeline.router = ModelRouter(pipeline.create_chat_model, tiers=tiers)
+    try:
+        print(f"{'fixture':<18} {'chars':>6} {'mode':<12} {'calls':>5} {'mean (s)':>9} {'tokens':>7} "
+              f"{'sections':>8} {'items':>6} {'fields':>7}  stages")
+        for fixture in fixtures:
+            for mode in ("multi_stage", "one_shot", "auto"):
+                mean, tokens, calls, result = asyncio.run(run_case(endpoint, fixture, mode, args.iterations))
+                sections, items, fields = completeness(result)
+                print(
+                    f"{fixture['name']:<18} {len(fixture['requirement_text']):>6} {mode:<12} {calls:>5} "
+                    f"{mean:>9.3f} {tokens:>7} {sections:>8} {items:>6} {fields:>7.0%}  "
+                    f"{','.join(result.get('stage_models', {}))}"
+                )
+    finally:
+        endpoint.stop()
+
+if __name__ == "__main__":
+    main()